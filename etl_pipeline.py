@@ -9,16 +9,160 @@ import pandas as pd
 import numpy as np
 import sys
 import os
+import gc
+import hashlib
 from datetime import datetime
 from sqlalchemy import create_engine, text
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
 # Import functions
 from functions.guess_column_types import guess_column_types
 from functions.filter_issue_date_range import filter_issue_date_range
 from functions.clean_missing_values import clean_missing_values
 
+# แปลงผลจาก guess_column_types เป็น dtype สำหรับ read_csv
+# (ประเภทอื่น เช่น datetime64 ให้ pandas infer เอง)
+COLUMN_TYPE_DTYPES = {
+    'integer': 'int64',
+    'floating': 'float64',
+    'string': 'object',
+}
+
+# เวอร์ชันของ Parquet cache: เพิ่มเลขนี้ทุกครั้งที่แก้การแปลงข้อมูลใน load_loan_data
+# (ชื่อไฟล์ cache ยังผูกกับ COLUMN_TYPE_DTYPES ด้วย จึงไม่ใช้ cache เก่าที่แปลงต่างกัน)
+LOAD_CACHE_VERSION = 2
+
+# Dimension ของ Star Schema: (คอลัมน์, ชื่อที่แสดง, ส่วนของวันที่ที่เพิ่มใน dimension)
+DIM_SPECS = [
+    ('home_ownership', 'Home Ownership', ()),
+    ('loan_status', 'Loan Status', ()),
+    ('issue_d', 'Issue Date', ('month', 'year', 'quarter')),
+]
+
+
+def get_parquet_cache_path(data_file):
+    """
+    สร้าง path ของ Parquet cache ที่ผูกกับเวอร์ชันและ schema ของการแปลงข้อมูล
+    
+    Args:
+        data_file: path ของไฟล์ CSV
+        
+    Returns:
+        str: path ของไฟล์ cache เช่น 'data/LoanStats_web_small.v1-1a2b3c4d.parquet'
+    """
+    schema_key = hashlib.md5(repr(sorted(COLUMN_TYPE_DTYPES.items())).encode('utf-8')).hexdigest()[:8]
+    return f"{os.path.splitext(data_file)[0]}.v{LOAD_CACHE_VERSION}-{schema_key}.parquet"
+
+
+def has_fresh_parquet_cache(data_file):
+    """
+    ตรวจว่ามี Parquet cache ที่ใช้ได้และใหม่กว่าไฟล์ CSV หรือไม่
+    
+    Args:
+        data_file: path ของไฟล์ CSV
+        
+    Returns:
+        bool: True ถ้าอ่านจาก cache ได้
+    """
+    parquet_file = get_parquet_cache_path(data_file)
+    return (CSV_ENGINE == 'pyarrow' and os.path.exists(parquet_file)
+            and os.path.getmtime(parquet_file) >= os.path.getmtime(data_file))
+
+
+def normalize_loan_columns(df):
+    """
+    แปลงคอลัมน์ dimension ให้อยู่ในรูปแบบเดียวกันไม่ว่าจะโหลดจาก CSV หรือ Parquet cache
+    
+    Args:
+        df: DataFrame ที่เพิ่งโหลด
+        
+    Returns:
+        DataFrame ที่ home_ownership, loan_status และ issue_d เป็น category
+    """
+    # เก็บคอลัมน์ string ที่มีค่าซ้ำเยอะเป็น category (ใช้ codes แทน string ทุกแถว)
+    for col in ('home_ownership', 'loan_status'):
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    
+    # แปลง issue_d เป็น datetime ครั้งเดียวด้วย format ตายตัว (เช่น 'Dec-2015')
+    # แล้วเก็บเป็น category เหมือนกัน (มีแค่หลักสิบเดือนที่ไม่ซ้ำ)
+    if 'issue_d' in df.columns and not isinstance(df['issue_d'].dtype, pd.CategoricalDtype):
+        issue_d = df['issue_d']
+        if not pd.api.types.is_datetime64_any_dtype(issue_d):
+            issue_d = pd.to_datetime(issue_d, format='%b-%Y', cache=True)
+        df['issue_d'] = issue_d.astype('category')
+    
+    return df
+
+
+def load_loan_data(data_file, column_types=None):
+    """
+    โหลดข้อมูล Loan จาก CSV โดยใช้ Parquet cache ถ้ามี
+    
+    ถ้ามีไฟล์ .parquet ที่ใหม่กว่า CSV จะอ่านจาก cache เลย
+    ถ้าไม่มีจะอ่าน CSV แปลงประเภทข้อมูล แล้วเขียน cache ไว้ใช้รอบถัดไป
+    
+    Args:
+        data_file: path ของไฟล์ CSV
+        column_types: dict ของประเภทคอลัมน์จาก guess_column_types
+                      (ไม่จำเป็นถ้ามี cache; ถ้าไม่มีจะให้ pandas infer เอง)
+        
+    Returns:
+        DataFrame ที่โหลดและแปลงประเภทแล้ว
+    """
+    parquet_file = get_parquet_cache_path(data_file)
+    
+    if has_fresh_parquet_cache(data_file):
+        print(f"   📦 Using Parquet cache: {parquet_file}")
+        # Parquet ไม่เก็บ category ของ datetime จึงต้องแปลงซ้ำให้เหมือนตอนอ่าน CSV
+        return normalize_loan_columns(pd.read_parquet(parquet_file, engine='pyarrow'))
+    
+    # ใช้ประเภทจาก Step 1 เพื่อไม่ให้ read_csv ต้อง infer ซ้ำ
+    dtypes = {col: COLUMN_TYPE_DTYPES[col_type] for col, col_type in (column_types or {}).items()
+              if col_type in COLUMN_TYPE_DTYPES}
+    if CSV_ENGINE == 'pyarrow':
+        df = pd.read_csv(data_file, dtype=dtypes, engine='pyarrow')
+    else:
+        # round_trip ให้ค่า float ตรงกับ pyarrow engine ทุกบิต
+        df = pd.read_csv(data_file, dtype=dtypes, low_memory=False, float_precision='round_trip')
+    
+    df = normalize_loan_columns(df)
+    
+    if CSV_ENGINE == 'pyarrow':
+        try:
+            df.to_parquet(parquet_file, engine='pyarrow', compression='zstd', index=False)
+            print(f"   📦 Saved Parquet cache: {parquet_file}")
+        except Exception as e:
+            print(f"   ⚠️  Could not write Parquet cache: {str(e)}")
+    
+    return df
+
+
+def factorize_column(series):
+    """
+    แปลงคอลัมน์เป็น (codes, uniques) สำหรับสร้าง dimension
+    ถ้าเป็น category อยู่แล้วจะใช้ codes เดิมโดยไม่ต้อง factorize ใหม่
+    uniques เรียงตามค่าเสมอ (เหมือน categories) เพื่อให้ id ของ dimension
+    ไม่ขึ้นกับ dtype หรือว่าโหลดข้อมูลมาจาก CSV หรือ Parquet cache
+    
+    Args:
+        series: Series ของคอลัมน์ dimension
+        
+    Returns:
+        tuple: (codes: np.ndarray, uniques: Index)
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.cat.remove_unused_categories()
+        return series.cat.codes.to_numpy(dtype=np.int32), series.cat.categories
+    return pd.factorize(series, sort=True)
+
 
 def create_star_schema(df):
     """
@@ -32,55 +176,67 @@ def create_star_schema(df):
     """
     print("\n🌟 Creating Star Schema...")
     
+    columns = set(df.columns)  # ใช้ set เพื่อเช็คคอลัมน์แบบ O(1)
     dim_tables = {}
-    fact_data = df.copy()
+    foreign_keys = {}  # FK arrays ของ fact table (ไม่ต้อง copy ทั้ง DataFrame)
     
-    # 1. Home Ownership Dimension
-    if 'home_ownership' in df.columns:
-        home_ownership_dim = df[['home_ownership']].drop_duplicates().reset_index(drop=True)
-        home_ownership_dim['home_ownership_id'] = home_ownership_dim.index + 1
-        dim_tables['home_ownership_dimfang'] = home_ownership_dim
+    # 1. Dimension Tables (ตาม DIM_SPECS)
+    for col, label, date_parts in DIM_SPECS:
+        if col not in columns:
+            continue
         
-        # Map to fact table
-        home_ownership_map = home_ownership_dim.set_index('home_ownership')['home_ownership_id'].to_dict()
-        fact_data['home_ownership_id'] = fact_data['home_ownership'].map(home_ownership_map)
-        print(f"   ✅ Home Ownership Dimension: {len(home_ownership_dim)} records")
-    
-    # 2. Loan Status Dimension
-    if 'loan_status' in df.columns:
-        loan_status_dim = df[['loan_status']].drop_duplicates().reset_index(drop=True)
-        loan_status_dim['loan_status_id'] = loan_status_dim.index + 1
-        dim_tables['loan_status_dimfang'] = loan_status_dim
+        codes, uniques = factorize_column(df[col])
+        dim_df = pd.DataFrame({
+            col: uniques,
+            f'{col}_id': np.arange(1, len(uniques) + 1, dtype=np.int32)
+        })
+        # คำนวณส่วนของวันที่จากค่า unique เท่านั้น ไม่ต้องทำทั้งคอลัมน์
+        for part in date_parts:
+            dim_df[part] = getattr(uniques, part)
+        dim_tables[f'{col}_dimfang'] = dim_df
         
-        # Map to fact table
-        loan_status_map = loan_status_dim.set_index('loan_status')['loan_status_id'].to_dict()
-        fact_data['loan_status_id'] = fact_data['loan_status'].map(loan_status_map)
-        print(f"   ✅ Loan Status Dimension: {len(loan_status_dim)} records")
-    
-    # 3. Issue Date Dimension
-    if 'issue_d' in df.columns:
-        issue_d_dim = df[['issue_d']].drop_duplicates().reset_index(drop=True)
-        issue_d_dim['issue_d_id'] = issue_d_dim.index + 1
-        issue_d_dim['month'] = issue_d_dim['issue_d'].dt.month
-        issue_d_dim['year'] = issue_d_dim['issue_d'].dt.year
-        issue_d_dim['quarter'] = issue_d_dim['issue_d'].dt.quarter
-        dim_tables['issue_d_dimfang'] = issue_d_dim
-        
-        # Map to fact table
-        issue_d_map = issue_d_dim.set_index('issue_d')['issue_d_id'].to_dict()
-        fact_data['issue_d_id'] = fact_data['issue_d'].map(issue_d_map)
-        print(f"   ✅ Issue Date Dimension: {len(issue_d_dim)} records")
-    
-    # 4. Create Fact Table
-    fact_columns = [
-        'loan_amnt', 'funded_amnt', 'term', 'int_rate', 'installment',
-        'home_ownership_id', 'loan_status_id', 'issue_d_id'
-    ]
-    
-    # เลือกเฉพาะคอลัมน์ที่มีอยู่
-    available_columns = [col for col in fact_columns if col in fact_data.columns]
-    fact_table = fact_data[available_columns].reset_index(drop=True)
-    fact_table['fact_id'] = fact_table.index + 1
+        # Map to fact table (codes จาก factorize คือ FK โดยตรง)
+        # ค่า null ได้ code -1 ซึ่งไม่มีใน dimension จึงให้ FK เป็น NA แทน
+        fk_values = (codes + 1).astype(np.int32)
+        is_null = codes < 0
+        if is_null.any():
+            fk_values = pd.arrays.IntegerArray(fk_values, is_null)
+        foreign_keys[f'{col}_id'] = fk_values
+        print(f"   ✅ {label} Dimension: {len(dim_df)} records")
+    
+    # 2. Create Fact Table
+    measure_columns = ['loan_amnt', 'funded_amnt', 'term', 'int_rate', 'installment']
+    
+    # เลือกเฉพาะคอลัมน์ที่มีอยู่ แล้วเติม FK จาก dimension
+    available_measures = [col for col in measure_columns if col in columns]
+    fact_table = df[available_measures].reset_index(drop=True)
+    for fk_column, fk_values in foreign_keys.items():
+        fact_table[fk_column] = fk_values
+    available_columns = available_measures + list(foreign_keys)
+    fact_table['fact_id'] = np.arange(1, len(fact_table) + 1, dtype=np.int32)
+    
+    # ลดขนาดตัวเลขของ measure (float32/int32) ก่อนส่งเข้า database
+    # จำนวนเงินที่เป็นจำนวนเต็มเก็บเป็น integer ส่วนอัตราดอกเบี้ยและค่างวดเป็น float เสมอ
+    measure_downcasts = {
+        'loan_amnt': None,
+        'funded_amnt': None,
+        'installment': 'float',
+        'int_rate': 'float',
+    }
+    for col, downcast in measure_downcasts.items():
+        if col in columns:
+            values = fact_table[col]
+            if not pd.api.types.is_numeric_dtype(values):
+                values = values.str.rstrip('%')  # เช่น '11.99%' -> '11.99'
+            values = pd.to_numeric(values)
+            if downcast is None:
+                downcast = 'integer' if pd.api.types.is_integer_dtype(values) else 'float'
+            fact_table[col] = pd.to_numeric(values, downcast=downcast)
+    
+    # term เช่น ' 36 months' -> 36 (ถ้ามี null ใช้ Int8 ที่รองรับ NA)
+    if 'term' in columns and not pd.api.types.is_numeric_dtype(fact_table['term']):
+        term = pd.to_numeric(fact_table['term'].str.extract(r'(\d+)', expand=False))
+        fact_table['term'] = term.astype('Int8') if term.isna().any() else term.astype(np.int8)
     
     print(f"   ✅ Fact Table: {len(fact_table)} records, {len(available_columns)} measures")
     
@@ -117,7 +273,7 @@ def show_etl_results(fact_table, dim_tables):
         print(f"\n💰 Sample Fact Records (Top 5):")
         sample_cols = ['fact_id', 'loan_amnt', 'funded_amnt', 'int_rate']
         available_sample_cols = [col for col in sample_cols if col in fact_table.columns]
-        print(fact_table[available_sample_cols].head())
+        print(fact_table[available_sample_cols].head().to_string())
         
         # Statistics
         if 'loan_amnt' in fact_table.columns:
@@ -128,6 +284,23 @@ def show_etl_results(fact_table, dim_tables):
             print(f"   - Total: ${fact_table['loan_amnt'].sum():,.2f}")
 
 
+def get_insert_chunksize(df, max_rows=1000, max_params=2100):
+    """
+    คำนวณ chunksize สำหรับ to_sql(method='multi')
+    MSSQL รับ parameter ได้ไม่เกิน 2100 ตัวต่อ statement
+    
+    Args:
+        df: DataFrame ที่จะ insert
+        max_rows: จำนวนแถวสูงสุดต่อ INSERT (default: 1000)
+        max_params: จำนวน parameter สูงสุดต่อ statement (default: 2100)
+        
+    Returns:
+        int: จำนวนแถวต่อ INSERT
+    """
+    n_columns = max(len(df.columns), 1)
+    return max(1, min(max_rows, (max_params - 1) // n_columns))
+
+
 def deploy_to_database(fact_table, dim_tables):
     """
     Deploy ข้อมูลไปยัง MSSQL Database
@@ -143,6 +316,7 @@ def deploy_to_database(fact_table, dim_tables):
     database = 'TestDB'
     username = 'SA'
     password = os.getenv('DB_PASSWORD', 'Passw0rd123456')
+    fact_table_name = 'loans_factfang'
     
     try:
         # Create database engine
@@ -151,33 +325,39 @@ def deploy_to_database(fact_table, dim_tables):
         
         print(f"   📡 Connecting to {server}/{database}...")
         
-        # Test connection
-        with engine.connect() as connection:
+        # ใช้ connection เดียวตลอด (login ครั้งเดียว) และ commit ครั้งเดียวตอนจบ
+        with engine.begin() as connection:
+            # Test connection
             result = connection.execute(text("SELECT 1 as test"))
             if result.fetchone()[0] == 1:
                 print("   ✅ Database connection successful")
-        
-        # Deploy dimension tables
-        print("\n   📤 Deploying dimension tables...")
-        for table_name, dim_df in dim_tables.items():
-            dim_df.to_sql(table_name, con=engine, if_exists='replace', index=False)
-            print(f"     ✅ {table_name}: {len(dim_df)} records")
-        
-        # Deploy fact table
-        print("\n   📤 Deploying fact table...")
-        fact_table.to_sql('loans_factfang', con=engine, if_exists='replace', index=False)
-        print(f"     ✅ loans_fact: {len(fact_table)} records")
+            
+            # Deploy dimension tables
+            print("\n   📤 Deploying dimension tables...")
+            for table_name, dim_df in dim_tables.items():
+                dim_df.to_sql(table_name, con=connection, if_exists='replace', index=False,
+                              method='multi', chunksize=get_insert_chunksize(dim_df))
+                print(f"     ✅ {table_name}: {len(dim_df)} records")
+            
+            # Deploy fact table
+            print("\n   📤 Deploying fact table...")
+            fact_table.to_sql(fact_table_name, con=connection, if_exists='replace', index=False,
+                              method='multi', chunksize=get_insert_chunksize(fact_table))
+            print(f"     ✅ {fact_table_name}: {len(fact_table)} records")
+            
+            # Verify deployment
+            print("\n🔍 Verifying deployment...")
+            # นับทุกตารางใน query เดียว (UNION ALL) แทนการ query ทีละตาราง
+            table_names = list(dim_tables.keys()) + [fact_table_name]
+            count_sql = " UNION ALL ".join(
+                f"SELECT '{table_name}' AS table_name, COUNT(*) AS n FROM {table_name}"
+                for table_name in table_names
+            )
+            for table_name, count in connection.execute(text(count_sql)).fetchall():
+                print(f"   📊 {table_name}: {count:,} records in database")
         
         print("\n🎉 Database deployment completed successfully!")
         
-        # Verify deployment
-        print("\n🔍 Verifying deployment...")
-        with engine.connect() as connection:
-            for table_name in list(dim_tables.keys()) + ['loans_fact']:
-                count_result = connection.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
-                count = count_result.fetchone()[0]
-                print(f"   📊 {table_name}: {count:,} records in database")
-        
         return True
         
     except Exception as e:
@@ -199,30 +379,39 @@ def main():
     # Check if running in deployment mode
     deploy_mode = '--deploy' in sys.argv
     
+    # แสดงผลลัพธ์แบบละเอียดเฉพาะตอนรันใน terminal (ใน CI ไม่มีใครอ่าน)
+    verbose = '--verbose' in sys.argv or (sys.stdout.isatty() and '--quiet' not in sys.argv)
+    
     try:
-        # Step 1: Analyze column types
+        # Step 1: Analyze column types (ข้ามได้ถ้ามี Parquet cache ซึ่งเก็บประเภทข้อมูลไว้แล้ว)
         print("\n📋 Step 1: Analyzing Column Types...")
-        success, column_types = guess_column_types(data_file)
-        
-        if not success:
-            print(f"❌ Column type analysis failed: {column_types}")
-            return False
-        
-        print(f"✅ Analyzed {len(column_types)} columns")
-        print("   Sample column types:")
-        for i, (col, dtype) in enumerate(list(column_types.items())[:5]):
-            print(f"     - {col}: {dtype}")
-        if len(column_types) > 5:
-            print(f"     ... and {len(column_types)-5} more")
+        column_types = None
+        if has_fresh_parquet_cache(data_file):
+            print("⏭️  Parquet cache found, column types already stored - skipping analysis")
+        else:
+            success, column_types = guess_column_types(data_file)
+            
+            if not success:
+                print(f"❌ Column type analysis failed: {column_types}")
+                return False
+            
+            print(f"✅ Analyzed {len(column_types)} columns")
+            print("   Sample column types:")
+            for i, (col, dtype) in enumerate(list(column_types.items())[:5]):
+                print(f"     - {col}: {dtype}")
+            if len(column_types) > 5:
+                print(f"     ... and {len(column_types)-5} more")
         
         # Step 2: Load raw data
         print(f"\n📂 Step 2: Loading Data from {data_file}...")
-        df = pd.read_csv(data_file, low_memory=False)
-        print(f"✅ Loaded: {len(df):,} rows, {len(df.columns)} columns")
+        df = load_loan_data(data_file, column_types)
+        original_rows = len(df)
+        print(f"✅ Loaded: {original_rows:,} rows, {len(df.columns)} columns")
         
         # Step 3: Clean missing values
         print(f"\n🧹 Step 3: Cleaning Missing Values...")
         df_clean = clean_missing_values(df, max_null_percentage=30)
+        del df  # ไม่ใช้แล้ว คืน memory ระหว่างทาง
         print(f"✅ After cleaning: {len(df_clean):,} rows, {len(df_clean.columns)} columns")
         
         # Step 4: Filter date range (if issue_d exists)
@@ -233,17 +422,27 @@ def main():
         else:
             df_filtered = df_clean
             print("⚠️  No 'issue_d' column found, skipping date filtering")
+        del df_clean
         
         # Step 5: Remove rows with any null values (for clean fact table)
         print(f"\n🔧 Step 5: Final Data Cleanup...")
-        df_final = df_filtered.dropna()
-        print(f"✅ Final dataset: {len(df_final):,} rows, {len(df_final.columns)} columns")
+        # สร้าง row mask จาก numpy boolean matrix ครั้งเดียว แทน dropna()
+        has_null = df_filtered.isna().to_numpy().any(axis=1)
+        df_final = df_filtered.iloc[~has_null]
+        del df_filtered, has_null
+        gc.collect()
+        final_rows = len(df_final)
+        print(f"✅ Final dataset: {final_rows:,} rows, {len(df_final.columns)} columns")
         
         # Step 6: Create star schema
         fact_table, dim_tables = create_star_schema(df_final)
+        del df_final
         
         # Step 7: Show results
-        show_etl_results(fact_table, dim_tables)
+        if verbose:
+            show_etl_results(fact_table, dim_tables)
+        else:
+            print(f"\n💡 Tip: Run with '--verbose' flag to show detailed ETL results")
         
         # Step 8: Deploy to database (if in deploy mode)
         if deploy_mode:
@@ -254,8 +453,8 @@ def main():
             print(f"\n💡 Tip: Run with '--deploy' flag to deploy to database")
         
         print(f"\n🎉 ETL Pipeline completed successfully!")
-        print(f"   - Original data: {len(df):,} rows")
-        print(f"   - Final data: {len(df_final):,} rows")
+        print(f"   - Original data: {original_rows:,} rows")
+        print(f"   - Final data: {final_rows:,} rows")
         print(f"   - Dimension tables: {len(dim_tables)}")
         print(f"   - Fact table records: {len(fact_table):,}")
         
@@ -28,14 +28,12 @@ def clean_missing_values(df, max_null_percentage=30):
     
     original_columns = len(df.columns)
     
-    # คำนวณ percentage ของ missing values ของแต่ละคอลัมน์
-    missing_percentage = df.isnull().mean() * 100
+    # คำนวณ percentage ของ missing values ของแต่ละคอลัมน์ (scan ครั้งเดียวบน numpy mask)
+    missing_percentage = df.isnull().to_numpy().mean(axis=0) * 100
     
     # กรองคอลัมน์ที่มี null เกินกว่า max_null_percentage ออกไป
-    columns_to_keep = missing_percentage[missing_percentage <= max_null_percentage].index.tolist()
-    
-    # สร้าง DataFrame ใหม่จากคอลัมน์ที่เลือก
-    filtered_df = df[columns_to_keep]
+    # แล้วสร้าง DataFrame ใหม่จากคอลัมน์ที่เลือก
+    filtered_df = df.loc[:, missing_percentage <= max_null_percentage]
     
     removed_columns = original_columns - len(filtered_df.columns)
     
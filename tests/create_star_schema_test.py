@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Simple Test Demo for Star Schema Functions
+ทดสอบฟังก์ชัน create_star_schema(), factorize_column() และ get_insert_chunksize() แบบง่าย
+"""
+
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# เพิ่ม path สำหรับ import etl_pipeline
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from etl_pipeline import create_star_schema, factorize_column, get_insert_chunksize
+
+# ===== Test Cases =====
+
+def test_case_1_measure_parsing():
+    """Test Case 1: การแปลง measure เป็นตัวเลข ('%' และ ' 36 months')"""
+    print("\n" + "="*60)
+    print("🧪 Test Case 1: การแปลง measure เป็นตัวเลข")
+    print("="*60)
+
+    # ข้อมูลรูปแบบเดียวกับ LoanStats
+    test_df = pd.DataFrame({
+        'loan_amnt': [10000, 25000, 5500],
+        'funded_amnt': [10000, 25000, 5500],
+        'term': [' 36 months', ' 60 months', '36 months'],
+        'int_rate': ['5.32%', '11.99%', ' 8.39%'],
+        'installment': [301.15, 830.24, 182.66]
+    })
+
+    print(f"📊 Input Data:")
+    print(f"   term: {test_df['term'].tolist()}")
+    print(f"   int_rate: {test_df['int_rate'].tolist()}")
+    print(f"   Expected output: term [36, 60, 36] (int8), int_rate [5.32, 11.99, 8.39] (float32)")
+
+    # เรียกใช้ฟังก์ชันที่ทดสอบ
+    fact_table, dim_tables = create_star_schema(test_df)
+
+    # ตรวจสอบผลลัพธ์
+    print(f"\n📋 Test Results:")
+    print(f"   term: {fact_table['term'].tolist()} ({fact_table['term'].dtype})")
+    print(f"   int_rate: {fact_table['int_rate'].tolist()} ({fact_table['int_rate'].dtype})")
+    print(f"   loan_amnt dtype: {fact_table['loan_amnt'].dtype}")
+    print(f"   installment dtype: {fact_table['installment'].dtype}")
+
+    # ตรวจสอบ
+    term_ok = fact_table['term'].tolist() == [36, 60, 36] and fact_table['term'].dtype == np.int8
+    rate_ok = (np.allclose(fact_table['int_rate'], [5.32, 11.99, 8.39])
+               and fact_table['int_rate'].dtype == np.float32)
+    amount_ok = (fact_table['loan_amnt'].tolist() == [10000, 25000, 5500]
+                 and pd.api.types.is_integer_dtype(fact_table['loan_amnt']))
+    installment_ok = (np.allclose(fact_table['installment'], [301.15, 830.24, 182.66])
+                      and fact_table['installment'].dtype == np.float32)
+
+    if term_ok and rate_ok and amount_ok and installment_ok:
+        print("   ✅ PASS: Measure parsing works correctly")
+        return True
+    else:
+        print("   ❌ FAIL: Measure parsing failed")
+        return False
+
+def test_case_2_dimension_round_trip():
+    """Test Case 2: FK ใน fact table ต้อง join กลับไปได้ค่าเดิมจาก dimension"""
+    print("\n" + "="*60)
+    print("🧪 Test Case 2: FK / Dimension round-trip")
+    print("="*60)
+
+    # home_ownership เป็น string, loan_status เป็น category (มี category ที่ไม่ได้ใช้)
+    # issue_d เป็น category ของ datetime (แบบเดียวกับที่ load_loan_data สร้าง)
+    home_ownership = ['RENT', 'OWN', 'RENT', 'MORTGAGE', 'OWN']
+    loan_status = pd.Categorical(['Fully Paid', 'Current', 'Fully Paid', 'Current', 'Charged Off'],
+                                 categories=['Charged Off', 'Current', 'Fully Paid', 'Unused'])
+    issue_d = pd.to_datetime(['Mar-2016', 'Dec-2017', 'Mar-2016', 'Jan-2019', 'Dec-2017'],
+                             format='%b-%Y').astype('category')
+    test_df = pd.DataFrame({
+        'home_ownership': home_ownership,
+        'loan_status': loan_status,
+        'issue_d': issue_d,
+        'loan_amnt': [1000, 2000, 3000, 4000, 5000]
+    })
+
+    print(f"📊 Input Data:")
+    print(f"   Total records: {len(test_df)}")
+    print(f"   Expected output: 3 home_ownership, 3 loan_status (no 'Unused'), 3 issue_d rows")
+
+    # เรียกใช้ฟังก์ชันที่ทดสอบ
+    fact_table, dim_tables = create_star_schema(test_df)
+
+    # join FK กลับไปที่ dimension
+    all_match = True
+    for col in ('home_ownership', 'loan_status', 'issue_d'):
+        dim_df = dim_tables[f'{col}_dimfang']
+        lookup = dim_df.set_index(f'{col}_id')[col]
+        joined = fact_table[f'{col}_id'].map(lookup).tolist()
+        expected = list(test_df[col])
+        match = joined == expected
+        all_match = all_match and match
+        print(f"   {col}: {len(dim_df)} dimension rows, FK dtype {fact_table[f'{col}_id'].dtype}, "
+              f"round-trip {'OK' if match else 'MISMATCH'}")
+
+    # ตรวจสอบ dimension ของวันที่
+    issue_d_dim = dim_tables['issue_d_dimfang']
+    date_parts_ok = (
+        issue_d_dim['month'].tolist() == [d.month for d in issue_d_dim['issue_d']]
+        and issue_d_dim['year'].tolist() == [d.year for d in issue_d_dim['issue_d']]
+        and issue_d_dim['quarter'].tolist() == [d.quarter for d in issue_d_dim['issue_d']]
+    )
+    sizes_ok = [len(dim_tables[name]) for name in
+                ('home_ownership_dimfang', 'loan_status_dimfang', 'issue_d_dimfang')] == [3, 3, 3]
+    fact_id_ok = fact_table['fact_id'].tolist() == [1, 2, 3, 4, 5]
+
+    print(f"\n📋 Test Results:")
+    print(f"   Round-trip: {all_match}")
+    print(f"   Date parts: {date_parts_ok}")
+    print(f"   Dimension sizes: {sizes_ok}")
+    print(f"   fact_id: {fact_table['fact_id'].tolist()}")
+
+    # ตรวจสอบ
+    if all_match and date_parts_ok and sizes_ok and fact_id_ok:
+        print("   ✅ PASS: FK / dimension round-trip works correctly")
+        return True
+    else:
+        print("   ❌ FAIL: FK / dimension round-trip failed")
+        return False
+
+def test_case_3_null_dimension_values():
+    """Test Case 3: ค่า null ใน dimension ต้องได้ FK เป็น NA (ไม่ใช่ 0)"""
+    print("\n" + "="*60)
+    print("🧪 Test Case 3: ค่า null ใน dimension")
+    print("="*60)
+
+    test_df = pd.DataFrame({
+        'home_ownership': ['RENT', None, 'OWN'],
+        'issue_d': pd.to_datetime(['2016-03-01', None, '2016-03-01']),
+        'loan_amnt': [1000, 2000, 3000]
+    })
+
+    print(f"📊 Input Data:")
+    print(f"   home_ownership: {test_df['home_ownership'].tolist()}")
+    print(f"   issue_d: {test_df['issue_d'].tolist()}")
+    print(f"   Expected output: FK ของแถวที่ 2 เป็น NA")
+
+    # เรียกใช้ฟังก์ชันที่ทดสอบ
+    fact_table, dim_tables = create_star_schema(test_df)
+
+    # ตรวจสอบผลลัพธ์
+    home_fk = fact_table['home_ownership_id']
+    issue_fk = fact_table['issue_d_id']
+
+    print(f"\n📋 Test Results:")
+    print(f"   home_ownership_id: {home_fk.tolist()}")
+    print(f"   issue_d_id: {issue_fk.tolist()}")
+
+    # ตรวจสอบ
+    nulls_ok = home_fk.isna().tolist() == [False, True, False] and issue_fk.isna().tolist() == [False, True, False]
+    no_zero_ok = not (home_fk == 0).any() and not (issue_fk == 0).any()
+    dims_ok = len(dim_tables['home_ownership_dimfang']) == 2 and len(dim_tables['issue_d_dimfang']) == 1
+
+    if nulls_ok and no_zero_ok and dims_ok:
+        print("   ✅ PASS: Null dimension values handled correctly")
+        return True
+    else:
+        print("   ❌ FAIL: Null dimension values handling failed")
+        return False
+
+def test_case_4_insert_chunksize():
+    """Test Case 4: chunksize ต้องไม่เกิน 2100 parameters ต่อ INSERT"""
+    print("\n" + "="*60)
+    print("🧪 Test Case 4: ขนาด chunk ของ to_sql(method='multi')")
+    print("="*60)
+
+    cases = [
+        # (จำนวนคอลัมน์, chunksize ที่คาดหวัง)
+        (1, 1000),     # ถูกจำกัดด้วย max_rows
+        (2, 1000),
+        (9, 233),      # fact table: 233 * 9 = 2097 <= 2099
+        (5, 419),      # issue_d dimension
+        (3000, 1),     # กว้างมาก - อย่างน้อย 1 แถว
+        (0, 1000),     # DataFrame ว่าง
+    ]
+
+    all_ok = True
+    print(f"📋 Test Results:")
+    for n_columns, expected in cases:
+        df = pd.DataFrame({f'c{i}': [1] for i in range(n_columns)})
+        chunksize = get_insert_chunksize(df)
+        within_limit = n_columns == 0 or chunksize == 1 or chunksize * n_columns < 2100
+        ok = chunksize == expected and within_limit
+        all_ok = all_ok and ok
+        print(f"   {n_columns} columns -> chunksize {chunksize} (expected {expected}) {'✅' if ok else '❌'}")
+
+    if all_ok:
+        print("   ✅ PASS: Chunk sizing works correctly")
+        return True
+    else:
+        print("   ❌ FAIL: Chunk sizing failed")
+        return False
+
+def test_case_5_factorize_column():
+    """Test Case 5: factorize_column ต้องได้ลำดับ id เดียวกันไม่ว่าคอลัมน์จะเป็น category หรือไม่"""
+    print("\n" + "="*60)
+    print("🧪 Test Case 5: factorize_column")
+    print("="*60)
+
+    # ลำดับที่พบครั้งแรกไม่ใช่ลำดับเวลา (แบบเดียวกับข้อมูลที่อ่านจาก Parquet cache)
+    dates = pd.Series(pd.to_datetime(['2016-03-01', '2016-02-01', None, '2016-01-01', '2016-03-01']))
+    plain_codes, plain_uniques = factorize_column(dates)
+    category_codes, category_uniques = factorize_column(dates.astype('category'))
+
+    # category ที่มี category ไม่ได้ใช้
+    unused = pd.Series(pd.Categorical(['b', 'b'], categories=['a', 'b', 'c']))
+    unused_codes, unused_uniques = factorize_column(unused)
+
+    print(f"📋 Test Results:")
+    print(f"   datetime codes: {plain_codes.tolist()} / category codes: {category_codes.tolist()}")
+    print(f"   datetime uniques: {[str(d.date()) for d in plain_uniques]}")
+    print(f"   category with unused: codes {unused_codes.tolist()}, uniques {list(unused_uniques)}")
+
+    # ตรวจสอบ
+    expected_dates = list(pd.to_datetime(['2016-01-01', '2016-02-01', '2016-03-01']))
+    order_ok = (plain_codes.tolist() == category_codes.tolist() == [2, 1, -1, 0, 2]
+                and list(plain_uniques) == list(category_uniques) == expected_dates)
+    unused_ok = (unused_codes.tolist() == [0, 0] and list(unused_uniques) == ['b']
+                 and unused_codes.dtype == np.int32)
+
+    if order_ok and unused_ok:
+        print("   ✅ PASS: factorize_column works correctly")
+        return True
+    else:
+        print("   ❌ FAIL: factorize_column failed")
+        return False
+
+def test_case_6_null_and_empty_measures():
+    """Test Case 6: term ที่เป็น null ต้องได้ NA และ DataFrame ว่างต้องยังได้ float สำหรับ int_rate/installment"""
+    print("\n" + "="*60)
+    print("🧪 Test Case 6: Null term และ DataFrame ว่าง")
+    print("="*60)
+
+    null_df = pd.DataFrame({
+        'term': [' 36 months', None, ' 60 months'],
+        'int_rate': ['5.32%', None, '11.99%']
+    })
+    empty_df = pd.DataFrame({
+        'term': pd.Series([], dtype=object),
+        'int_rate': pd.Series([], dtype=object),
+        'installment': pd.Series([], dtype=object)
+    })
+
+    print(f"📊 Input Data:")
+    print(f"   term: {null_df['term'].tolist()}")
+    print(f"   int_rate: {null_df['int_rate'].tolist()}")
+    print(f"   Expected output: term [36, <NA>, 60] (Int8), empty int_rate/installment are float32")
+
+    # เรียกใช้ฟังก์ชันที่ทดสอบ
+    try:
+        null_fact, _ = create_star_schema(null_df)
+        empty_fact, _ = create_star_schema(empty_df)
+    except Exception as e:
+        print(f"   ❌ FAIL: create_star_schema raised {type(e).__name__}: {e}")
+        return False
+
+    # ตรวจสอบผลลัพธ์
+    print(f"\n📋 Test Results:")
+    print(f"   term: {null_fact['term'].tolist()} ({null_fact['term'].dtype})")
+    print(f"   int_rate: {null_fact['int_rate'].tolist()} ({null_fact['int_rate'].dtype})")
+    print(f"   empty dtypes: {empty_fact.dtypes.astype(str).to_dict()}")
+
+    # ตรวจสอบ
+    term_ok = (null_fact['term'].isna().tolist() == [False, True, False]
+               and null_fact['term'].dropna().tolist() == [36, 60]
+               and str(null_fact['term'].dtype) == 'Int8')
+    rate_ok = null_fact['int_rate'].isna().tolist() == [False, True, False]
+    empty_ok = (len(empty_fact) == 0
+                and empty_fact['int_rate'].dtype == np.float32
+                and empty_fact['installment'].dtype == np.float32)
+
+    if term_ok and rate_ok and empty_ok:
+        print("   ✅ PASS: Null and empty measures handled correctly")
+        return True
+    else:
+        print("   ❌ FAIL: Null or empty measures handling failed")
+        return False
+
+def run_all_tests():
+    """รัน Test Cases ทั้งหมด"""
+    print("🚀 Starting Star Schema Function Tests")
+    print("Target: create_star_schema() - สร้าง fact/dimension tables สำหรับ deploy")
+
+    results = []
+
+    # รัน test cases
+    results.append(test_case_1_measure_parsing())
+    results.append(test_case_2_dimension_round_trip())
+    results.append(test_case_3_null_dimension_values())
+    results.append(test_case_4_insert_chunksize())
+    results.append(test_case_5_factorize_column())
+    results.append(test_case_6_null_and_empty_measures())
+
+    # สรุปผลลัพธ์
+    print("\n" + "="*60)
+    print("📊 SUMMARY RESULTS")
+    print("="*60)
+
+    test_names = [
+        "Test Case 1: การแปลง measure เป็นตัวเลข",
+        "Test Case 2: FK / Dimension round-trip",
+        "Test Case 3: ค่า null ใน dimension",
+        "Test Case 4: ขนาด chunk ของ to_sql",
+        "Test Case 5: factorize_column",
+        "Test Case 6: Null term และ DataFrame ว่าง"
+    ]
+
+    passed = 0
+    for i, (name, result) in enumerate(zip(test_names, results)):
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{i+1}. {name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\n🎯 Overall Result: {passed}/{len(results)} tests passed")
+
+    if passed == len(results):
+        print("🎉 ALL TESTS PASSED! ฟังก์ชันทำงานถูกต้องตาม spec")
+    else:
+        print("⚠️  SOME TESTS FAILED! ต้องแก้ไขฟังก์ชัน")
+
+    return passed == len(results)
+
+if __name__ == "__main__":
+    # รัน tests
+    success = run_all_tests()
+
+    print(f"\n{'='*60}")
+    print("🔚 Test Execution Complete")
+    print(f"{'='*60}")
+
+    exit(0 if success else 1)
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Simple Test Demo for Data Loading Function
+ทดสอบฟังก์ชัน load_loan_data() และ Parquet cache แบบง่าย
+"""
+
+import pandas as pd
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+# เพิ่ม path สำหรับ import etl_pipeline
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import etl_pipeline
+from etl_pipeline import load_loan_data, get_parquet_cache_path, has_fresh_parquet_cache
+
+# ===== Helpers =====
+
+def create_test_csv(directory):
+    """สร้างไฟล์ CSV ตัวอย่างรูปแบบเดียวกับ LoanStats"""
+    test_df = pd.DataFrame({
+        'loan_amnt': [10000, 25000, 5500, 20000, 8000],
+        'int_rate': ['5.32%', '11.99%', '11.99%', '8.39%', '7.21%'],
+        'total_pymnt': [10448.7728879296, 25681.07, 6514.3532835062, 22446.0094492714, 8123.45],
+        'home_ownership': ['OWN', 'RENT', 'MORTGAGE', 'MORTGAGE', 'RENT'],
+        'loan_status': ['Fully Paid', 'Fully Paid', 'Current', 'Charged Off', 'Current'],
+        # ลำดับที่พบครั้งแรกไม่ใช่ลำดับเวลา เพื่อจับกรณี id ของ issue_d เปลี่ยนลำดับ
+        'issue_d': ['Mar-2016', 'Jan-2016', 'Feb-2016', 'Mar-2016', 'Jan-2016']
+    })
+    file_path = os.path.join(directory, 'loans.csv')
+    test_df.to_csv(file_path, index=False)
+    return file_path
+
+# ===== Test Cases =====
+
+def test_case_1_cache_miss_hit_equivalence():
+    """Test Case 1: ข้อมูลที่โหลดจาก CSV (cache miss) ต้องเหมือนกับที่โหลดจาก Parquet cache (cache hit)"""
+    print("\n" + "="*60)
+    print("🧪 Test Case 1: Cache miss vs cache hit")
+    print("="*60)
+
+    if etl_pipeline.CSV_ENGINE != 'pyarrow':
+        print("   ⚠️  pyarrow not installed - Parquet cache disabled, skipping")
+        return True
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        data_file = create_test_csv(temp_dir)
+
+        print(f"📊 Input Data:")
+        print(f"   CSV: {data_file}")
+        print(f"   Expected output: identical DataFrames from both loads")
+
+        # เรียกใช้ฟังก์ชันที่ทดสอบ (ครั้งแรกอ่าน CSV ครั้งที่สองอ่าน cache)
+        miss_df = load_loan_data(data_file)
+        hit_df = load_loan_data(data_file)
+
+        # ตรวจสอบผลลัพธ์
+        try:
+            pd.testing.assert_frame_equal(miss_df, hit_df, check_exact=True)
+            frames_equal = True
+        except AssertionError as e:
+            print(f"   Difference: {e}")
+            frames_equal = False
+
+        dtypes_ok = all(isinstance(hit_df[col].dtype, pd.CategoricalDtype)
+                        for col in ('home_ownership', 'loan_status', 'issue_d'))
+        chronological_ok = dtypes_ok and list(hit_df['issue_d'].cat.categories) == list(pd.to_datetime(
+            ['2016-01-01', '2016-02-01', '2016-03-01']))
+
+        print(f"\n📋 Test Results:")
+        print(f"   Frames equal: {frames_equal}")
+        print(f"   issue_d dtype (hit): {hit_df['issue_d'].dtype}")
+        print(f"   issue_d categories chronological: {chronological_ok}")
+
+        # ตรวจสอบ
+        if frames_equal and dtypes_ok and chronological_ok:
+            print("   ✅ PASS: Cache miss and cache hit return the same data")
+            return True
+        else:
+            print("   ❌ FAIL: Cache miss and cache hit differ")
+            return False
+    finally:
+        shutil.rmtree(temp_dir)
+
+def test_case_2_cache_path_key():
+    """Test Case 2: ชื่อไฟล์ cache ต้องผูกกับเวอร์ชันและ COLUMN_TYPE_DTYPES"""
+    print("\n" + "="*60)
+    print("🧪 Test Case 2: Parquet cache path")
+    print("="*60)
+
+    data_file = os.path.join('data', 'loans.csv')
+    path = get_parquet_cache_path(data_file)
+    same_path = get_parquet_cache_path(data_file)
+
+    # เปลี่ยน dtype mapping ชั่วคราว - ต้องได้ชื่อไฟล์ใหม่
+    original_dtypes = dict(etl_pipeline.COLUMN_TYPE_DTYPES)
+    try:
+        etl_pipeline.COLUMN_TYPE_DTYPES['integer'] = 'Int64'
+        changed_path = get_parquet_cache_path(data_file)
+    finally:
+        etl_pipeline.COLUMN_TYPE_DTYPES.clear()
+        etl_pipeline.COLUMN_TYPE_DTYPES.update(original_dtypes)
+
+    print(f"📋 Test Results:")
+    print(f"   Cache path: {path}")
+    print(f"   Cache path (dtypes changed): {changed_path}")
+
+    # ตรวจสอบ
+    prefix_ok = path.startswith(os.path.join('data', f'loans.v{etl_pipeline.LOAD_CACHE_VERSION}-'))
+    if prefix_ok and path.endswith('.parquet') and path == same_path and path != changed_path:
+        print("   ✅ PASS: Cache path is keyed on version and dtype schema")
+        return True
+    else:
+        print("   ❌ FAIL: Cache path key is wrong")
+        return False
+
+def test_case_3_cache_freshness():
+    """Test Case 3: cache ต้องใช้ได้เฉพาะเมื่อใหม่กว่าไฟล์ CSV"""
+    print("\n" + "="*60)
+    print("🧪 Test Case 3: Parquet cache freshness")
+    print("="*60)
+
+    if etl_pipeline.CSV_ENGINE != 'pyarrow':
+        print("   ⚠️  pyarrow not installed - Parquet cache disabled, skipping")
+        return True
+
+    temp_dir = tempfile.mkdtemp()
+    try:
+        data_file = create_test_csv(temp_dir)
+
+        before_load = has_fresh_parquet_cache(data_file)
+        load_loan_data(data_file)
+        after_load = has_fresh_parquet_cache(data_file)
+
+        # แก้ไข CSV ให้ใหม่กว่า cache
+        newer = time.time() + 10
+        os.utime(data_file, (newer, newer))
+        after_csv_change = has_fresh_parquet_cache(data_file)
+
+        print(f"📋 Test Results:")
+        print(f"   Before first load: {before_load} (expected False)")
+        print(f"   After first load: {after_load} (expected True)")
+        print(f"   After CSV changed: {after_csv_change} (expected False)")
+
+        # ตรวจสอบ
+        if not before_load and after_load and not after_csv_change:
+            print("   ✅ PASS: Cache freshness works correctly")
+            return True
+        else:
+            print("   ❌ FAIL: Cache freshness failed")
+            return False
+    finally:
+        shutil.rmtree(temp_dir)
+
+def run_all_tests():
+    """รัน Test Cases ทั้งหมด"""
+    print("🚀 Starting Data Loading Function Tests")
+    print("Target: load_loan_data() - โหลดข้อมูลจาก CSV หรือ Parquet cache ให้ได้ผลเหมือนกัน")
+
+    results = []
+
+    # รัน test cases
+    results.append(test_case_1_cache_miss_hit_equivalence())
+    results.append(test_case_2_cache_path_key())
+    results.append(test_case_3_cache_freshness())
+
+    # สรุปผลลัพธ์
+    print("\n" + "="*60)
+    print("📊 SUMMARY RESULTS")
+    print("="*60)
+
+    test_names = [
+        "Test Case 1: Cache miss vs cache hit",
+        "Test Case 2: Parquet cache path",
+        "Test Case 3: Parquet cache freshness"
+    ]
+
+    passed = 0
+    for i, (name, result) in enumerate(zip(test_names, results)):
+        status = "✅ PASS" if result else "❌ FAIL"
+        print(f"{i+1}. {name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\n🎯 Overall Result: {passed}/{len(results)} tests passed")
+
+    if passed == len(results):
+        print("🎉 ALL TESTS PASSED! ฟังก์ชันทำงานถูกต้องตาม spec")
+    else:
+        print("⚠️  SOME TESTS FAILED! ต้องแก้ไขฟังก์ชัน")
+
+    return passed == len(results)
+
+if __name__ == "__main__":
+    # รัน tests
+    success = run_all_tests()
+
+    print(f"\n{'='*60}")
+    print("🔚 Test Execution Complete")
+    print(f"{'='*60}")
+
+    exit(0 if success else 1)